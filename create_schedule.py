@@ -1,19 +1,144 @@
 import pulp
-import pandas as pd
 import os
+import atexit
+import threading
+import sys
+import signal
+import subprocess
+import time
+import queue
+import multiprocessing
 import random
-import copy
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill
 from helper_functions import excel_sheets_to_items
 
-T = range # Time slots from 8 AM to 5 PM (represented as hours)
+T = range(8, 18)  # Time slots from 8 AM to 5 PM (represented as hours)
+
+# Solver configurations raced against each other by solve_portfolio, the first to prove optimality or infeasibility wins
+PORTFOLIO_CONFIGURATIONS = [
+    {"name": "cbc_default", "solver": "PULP_CBC_CMD", "options": {}},
+    {"name": "cbc_seed_1", "solver": "PULP_CBC_CMD", "options": {"options": ["randomSeed 1", "randomCbcSeed 1"]}},
+    {"name": "cbc_seed_2", "solver": "PULP_CBC_CMD", "options": {"options": ["randomSeed 2", "randomCbcSeed 2"]}},
+    {"name": "cbc_no_presolve_no_cuts", "solver": "PULP_CBC_CMD", "options": {"presolve": False, "cuts": False}},
+    {"name": "cbc_greedy_warm_start", "solver": "PULP_CBC_CMD", "options": {"warmStart": True}, "warm_start": True},
+    {"name": "highs", "solver": ["HiGHS_CMD", "HiGHS"], "options": {}},
+    {"name": "glpk", "solver": "GLPK_CMD", "options": {}},
+]
+
+def create_original_schedule(input_file_path, output_file_path, portfolio=False, lexicographic=False):
+    if portfolio and lexicographic:
+        raise ValueError("The portfolio and lexicographic modes cannot be combined, choose one of them")
 
-def create_original_schedule(input_file_path, output_file_path):
     # Define sets
     C, P, E, Ce, caregiver_unavailability, patient_unavailability, patient_equipment_mapping = \
         excel_sheets_to_items(input_file_path)
 
+    # Solve the problem
+    xcpt = None
+    if lexicographic:
+        status_name, assignments, _ = solve_lexicographic(C, P, E, Ce, caregiver_unavailability,
+                                                          patient_unavailability, patient_equipment_mapping)
+    elif portfolio:
+        status_name, assignments = solve_portfolio(C, P, E, Ce, caregiver_unavailability, patient_unavailability,
+                                                   patient_equipment_mapping)
+    else:
+        problem, xcpt = build_scheduling_problem(C, P, E, Ce, caregiver_unavailability, patient_unavailability,
+                                                 patient_equipment_mapping)
+        status_name = pulp.LpStatus[problem.solve()]
+        assignments = None
+
+    if status_name == 'Optimal':
+        print("Optimal Solution Found")
+        if assignments is None:
+            assignments = iterate_assignments(xcpt)
+    else:
+        print("No optimal solution found. Creating a feasible schedule to maximize patient treatment.")
+        if xcpt is None:
+            xcpt = pulp.LpVariable.dicts("xcpt",
+                                         [(c, p, t, e) for c in C for p in P for t in T for e in E],
+                                         cat='Binary')
+
+        # Define a new problem to maximize the number of treated patients
+        problem_feasible = pulp.LpProblem("Feasible_Caregiver_Scheduling", pulp.LpMaximize)
+
+        # New objective function: maximize the number of patients treated
+        problem_feasible += pulp.lpSum(xcpt[c, p, t, e] for c in C for p in P for t in T for e in E), "Maximize_Patients_Treated"
+
+        # Apply the same constraints but ignore constraints 6 & 9
+        for c in C:
+            for t in T:
+                problem_feasible += pulp.lpSum(xcpt[c, p, t, e] for p in P for e in E) <= 1, f"Caregiver_{c}time{t}"
+
+        for p in P:
+            for t in T:
+                problem_feasible += pulp.lpSum(xcpt[c, p, t, e] for c in C for e in E) <= 1, f"Patient_{p}time{t}"
+
+        for c in C:
+            for t in caregiver_unavailability.get(c, []):
+                for p in P:
+                    for e in E:
+                        problem_feasible += xcpt[c, p, t, e] == 0, f"Unavailable_Caregiver_{c}{p}{t}_{e}"
+
+        for p in P:
+            for t in patient_unavailability.get(p, []):
+                for c in C:
+                    for e in E:
+                        problem_feasible += xcpt[c, p, t, e] == 0, f"Unavailable_Patient_{p}{c}{t}_{e}"
+
+        for e in E:
+            for t in T:
+                problem_feasible += pulp.lpSum(xcpt[c, p, t, e] for c in C for p in P) <= 1, f"Equipment_{e}time{t}"
+
+        for c in C:
+            allowed_equipments = Ce.get(c, [])
+            for e in E:
+                if e not in allowed_equipments:
+                    for p in P:
+                        for t in T:
+                            problem_feasible += xcpt[c, p, t, e] == 0, f"Caregiver_{c}cannot_use{e}at_time{t}for_patient{p}"
+
+        for p in P:
+            required_equipments = dict(patient_equipment_mapping.get(p, []))
+            for e in E:
+                if e not in required_equipments:
+                    for c in C:
+                        for t in T:
+                            problem_feasible += xcpt[c, p, t, e] == 0, f"Patient_{p}doesnt_need{e}at_time{t}with_caregiver{c}"
+
+        for p in P:
+            required_equipments = dict(patient_equipment_mapping.get(p, []))
+            for e, num_appointments in required_equipments.items():
+                problem_feasible += pulp.lpSum(
+                    xcpt[c, p, t, e] for c in C for t in T) <= num_appointments, f"Patient_{p}Equipment{e}_Appointments"
+
+        # Solve the modified problem
+        status_feasible = problem_feasible.solve()
+
+        if pulp.LpStatus[status_feasible] == 'Optimal':
+            assignments = iterate_assignments(xcpt)
+        else:
+            print("No feasible solution found. Check constraints and availability.")
+            assignments = []
+
+    # The assignments are streamed into the workbook, no dense time x caregiver grid is built
+    save_assignments_to_excel(assignments, input_file_path, output_file_path)
+
+
+def iterate_assignments(xcpt):
+    # Yield (caregiver, patient, time, equipment) for every variable the solver set to 1.
+    # pulp loads a value into every variable (CBC writes the full solution), so this is still one pass
+    # over all of xcpt, O(C x P x T x E). It only reads varValue instead of calling pulp.value per variable,
+    # and yields lazily so the assignments are never collected into a grid
+    for key, variable in xcpt.items():
+        if variable.varValue is not None and variable.varValue > 0.5:
+            yield key
+
+
+def build_scheduling_problem(C, P, E, Ce, caregiver_unavailability, patient_unavailability, patient_equipment_mapping,
+                             relax_demand=False):
+    # With relax_demand=True Constraint 6 becomes an upper bound so that partial schedules are feasible,
+    # and Constraint 9 books each repeated treatment as one block of consecutive sessions or not at all
     # Binary variables xcpt, where xcpt = 1 if caregiver c cares for patient p at time t using equipment e
     xcpt = pulp.LpVariable.dicts("xcpt",
                                  [(c, p, t, e) for c in C for p in P for t in T for e in E],
@@ -63,7 +188,11 @@ def create_original_schedule(input_file_path, output_file_path):
     for p in P:
         required_equipments = dict(patient_equipment_mapping.get(p, []))
         for e, num_appointments in required_equipments.items():
-            problem += pulp.lpSum(xcpt[c, p, t, e] for c in C for t in T) == num_appointments, f"Patient_{p}Equipment{e}_Appointments"
+            appointments = pulp.lpSum(xcpt[c, p, t, e] for c in C for t in T)
+            if relax_demand:
+                problem += appointments <= num_appointments, f"Patient_{p}Equipment{e}_Appointments"
+            else:
+                problem += appointments == num_appointments, f"Patient_{p}Equipment{e}_Appointments"
 
     # Constraint 7: Ensure caregivers use only equipment they are qualified for
     for c in C:
@@ -83,6 +212,23 @@ def create_original_schedule(input_file_path, output_file_path):
                     for t in T:
                         problem += xcpt[c, p, t, e] == 0, f"Patient_{p}doesnt_need{e}at_time{t}with_caregiver{c}"
 
+    if relax_demand:
+        # Constraint 9: Repeated appointments of a patient with an equipment form one block of consecutive
+        # time slots with the same caregiver. scpt = 1 if caregiver c starts the block of patient p with e at time t
+        for p in P:
+            for equipment, usage_count in patient_equipment_mapping[p]:
+                if usage_count > 1 and equipment in E:
+                    starts = [t for t in T if t + usage_count - 1 in T]
+                    scpt = pulp.LpVariable.dicts(f"scpt_{p}_{equipment}", [(c, t) for c in C for t in starts],
+                                                 cat='Binary')
+                    problem += pulp.lpSum(scpt.values()) <= 1, f"Single_Block_Patient_{p}_Equipment_{equipment}"
+                    for c in C:
+                        for t in T:
+                            problem += xcpt[c, p, t, equipment] == pulp.lpSum(
+                                scpt[c, start] for start in starts if start <= t < start + usage_count), \
+                                f"Consecutive_Appointments_Same_Caregiver_Patient_{p}_Equipment_{equipment}_Time_{t}_Caregiver_{c}"
+        return problem, xcpt
+
     # Constraint 9: Ensure patients have consecutive appointments with the same caregiver
     for p in P:
         for equipment, usage_count in patient_equipment_mapping[p]:
@@ -103,135 +249,283 @@ def create_original_schedule(input_file_path, output_file_path):
                                 problem += pulp.lpSum(xcpt[c, p, t + j, equipment] for j in range(i, usage_count)) >= 1, \
                                     f"Consecutive_Appointments_Same_Caregiver_Patient_{p}_Equipment_{equipment}_Time_{t}_Caregiver_{c}_{i}"
 
-    # Solve the problem
-    status = problem.solve()
+    return problem, xcpt
 
-    # Prepare data for exporting to Excel
-    schedule = {t: {c: "" for c in C} for t in T}  # Dictionary to store schedule (times as rows, caregivers as columns)
 
-    if pulp.LpStatus[status] == 'Optimal':
-        print("Optimal Solution Found:")
-        for c in C:
-            for p in P:
-                for t in T:
-                    for e in E:
-                        if pulp.value(xcpt[c, p, t, e]) == 1:
-                            schedule[t][c] = f"{p}, {e}"
-                            print(f"Caregiver {c} cares for Patient {p} at time {t} with {e}")
-    else:
-        print("No optimal solution found. Creating a feasible schedule to maximize patient treatment.")
-        # Define a new problem to maximize the number of treated patients
-        problem_feasible = pulp.LpProblem("Feasible_Caregiver_Scheduling", pulp.LpMaximize)
-
-        # New objective function: maximize the number of patients treated
-        problem_feasible += pulp.lpSum(xcpt[c, p, t, e] for c in C for p in P for t in T for e in E), "Maximize_Patients_Treated"
-
-        # Apply the same constraints but ignore constraints 6 & 9
-        for c in C:
-            for t in T:
-                problem_feasible += pulp.lpSum(xcpt[c, p, t, e] for p in P for e in E) <= 1, f"Caregiver_{c}time{t}"
+def solve_lexicographic(C, P, E, Ce, caregiver_unavailability, patient_unavailability, patient_equipment_mapping):
+    # Solve the ranked goals one after another on the same model: each stage keeps the previous optima
+    # as constraints and CBC is warm-started from the previous stage's solution
+    problem, xcpt = build_scheduling_problem(C, P, E, Ce, caregiver_unavailability, patient_unavailability,
+                                             patient_equipment_mapping, relax_demand=True)
 
+    # Binary variables ycp, where ycp = 1 if caregiver c cares for patient p at any time,
+    # linked per equipment with its demand as the bound to keep the LP relaxation tight
+    ycp = pulp.LpVariable.dicts("ycp", [(c, p) for c in C for p in P], cat='Binary')
+    for c in C:
         for p in P:
-            for t in T:
-                problem_feasible += pulp.lpSum(xcpt[c, p, t, e] for c in C for e in E) <= 1, f"Patient_{p}time{t}"
-
-        for c in C:
-            for t in caregiver_unavailability.get(c, []):
-                for p in P:
-                    for e in E:
-                        problem_feasible += xcpt[c, p, t, e] == 0, f"Unavailable_Caregiver_{c}{p}{t}_{e}"
+            for e, num_appointments in dict(patient_equipment_mapping.get(p, [])).items():
+                if e in E:
+                    problem += pulp.lpSum(xcpt[c, p, t, e] for t in T) <= num_appointments * ycp[c, p], \
+                        f"Caregiver_{c}_treats_Patient_{p}_with_{e}"
 
-        for p in P:
-            for t in patient_unavailability.get(p, []):
+    # Binary variables treated_p, where treated_p = 1 if patient p has at least one appointment
+    treated_p = pulp.LpVariable.dicts("treated_p", P, cat='Binary')
+    for p in P:
+        problem += treated_p[p] <= pulp.lpSum(ycp[c, p] for c in C), f"Patient_{p}_treated"
+
+    stages = [
+        ("Maximize_Treated_Demand", pulp.LpMaximize,
+         pulp.lpSum(xcpt.values())),
+        # Counts only the caregivers beyond the first of each treated patient, so dropping patients is not rewarded
+        ("Minimize_Caregivers_Per_Patient", pulp.LpMinimize,
+         pulp.lpSum(ycp.values()) - pulp.lpSum(treated_p.values())),
+        ("Minimize_Lateness", pulp.LpMinimize,
+         pulp.lpSum(xcpt[c, p, t, e] * t for c in C for p in P for t in T for e in E)),
+    ]
+
+    status_name, assignments = "Not Solved", None
+    stage_reports = []
+    for stage_number, (name, sense, objective) in enumerate(stages, start=1):
+        problem.sense = sense
+        problem.setObjective(objective)
+
+        start_time = time.time()
+        stage_status_name = pulp.LpStatus[problem.solve(pulp.PULP_CBC_CMD(msg=False, warmStart=stage_number > 1))]
+        elapsed = time.time() - start_time
+
+        optimum = pulp.value(objective) if stage_status_name == 'Optimal' else None
+        stage_reports.append((name, stage_status_name, optimum, elapsed))
+        print(f"Stage {stage_number} {name}: {stage_status_name}, objective {optimum}, {elapsed:.2f} seconds")
+        if stage_status_name != 'Optimal':
+            # Keep the schedule of the last stage that was solved to optimality
+            break
+        status_name = stage_status_name
+        assignments = list(iterate_assignments(xcpt))
+
+        # Keep this optimum in the next stages, the objectives are integral so rounding is exact
+        if sense == pulp.LpMaximize:
+            problem += objective >= round(optimum), f"Lexicographic_{name}"
+        else:
+            problem += objective <= round(optimum), f"Lexicographic_{name}"
+
+        # The current solution stays feasible for the next stage, use it as its starting point
+        for variable in problem.variables():
+            if variable.varValue is not None:
+                variable.setInitialValue(round(variable.varValue))
+
+    print(f"Lexicographic solve finished in {sum(report[3] for report in stage_reports):.2f} seconds")
+
+    return status_name, assignments, stage_reports
+
+
+def solve_portfolio(C, P, E, Ce, caregiver_unavailability, patient_unavailability, patient_equipment_mapping,
+                    configurations=PORTFOLIO_CONFIGURATIONS, max_workers=None):
+    # Run the available solver configurations in separate processes, at most max_workers at a time
+    # (one per CPU by default), and keep the first one that proves optimality or infeasibility
+    items = (C, P, E, Ce, caregiver_unavailability, patient_unavailability, patient_equipment_mapping)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    pending = []
+    for configuration in configurations:
+        solver_name = _available_solver_name(configuration["solver"])
+        if solver_name is None:
+            print(f"Portfolio configuration {configuration['name']} skipped, {configuration['solver']} is not available")
+            continue
+        pending.append(dict(configuration, solver=solver_name))
+
+    results = multiprocessing.Queue()
+    processes = {}
+    running = set()
+
+    # Kill the workers' process trees however the parent stops: SIGTERM is turned into SystemExit so the
+    # finally block runs, and atexit covers interpreter shutdown
+    atexit.register(_kill_process_trees, processes)
+    previous_sigterm_handler = None
+    if threading.current_thread() is threading.main_thread():
+        previous_sigterm_handler = signal.signal(signal.SIGTERM, _raise_system_exit)
+
+    status_name, assignments = "Not Solved", None
+    try:
+        while pending or running:
+            while pending and len(running) < max_workers:
+                configuration = pending.pop(0)
+                process = multiprocessing.Process(target=_solve_portfolio_configuration,
+                                                  args=(configuration, items, results, os.getpid()), daemon=True)
+                process.start()
+                processes[configuration["name"]] = process
+                running.add(configuration["name"])
+
+            try:
+                name, current_status_name, current_assignments, elapsed = results.get(timeout=1)
+            except queue.Empty:
+                # Configurations that died without reporting free their slot
+                for name in [name for name in running if processes[name].exitcode not in (None, 0)]:
+                    print(f"Portfolio configuration {name} died with exit code {processes[name].exitcode}")
+                    running.discard(name)
+                continue
+            running.discard(name)
+            print(f"Portfolio configuration {name} finished with status {current_status_name} after {elapsed:.2f} seconds")
+            if current_status_name in ('Optimal', 'Infeasible'):
+                print(f"Portfolio winner: {name} proved the problem {current_status_name}")
+                status_name = current_status_name
+                assignments = current_assignments if current_status_name == 'Optimal' else None
+                break
+            if status_name == "Not Solved":
+                status_name = current_status_name
+    finally:
+        # The remaining configurations are no longer needed, kill them together with their solver subprocesses.
+        # The workers run in their own process groups, so they do not receive the terminal's signals
+        _kill_process_trees(processes)
+        atexit.unregister(_kill_process_trees)
+        if previous_sigterm_handler is not None:
+            signal.signal(signal.SIGTERM, previous_sigterm_handler)
+
+    return status_name, assignments
+
+
+def _available_solver_name(solver_names):
+    # A configuration names one pulp solver or a list of alternatives, e.g. a command-line backend
+    # followed by its in-process version
+    if isinstance(solver_names, str):
+        solver_names = [solver_names]
+    for solver_name in solver_names:
+        solver_class = getattr(pulp, solver_name, None)
+        if solver_class is not None and solver_class(msg=False).available():
+            return solver_name
+    return None
+
+
+def _raise_system_exit(signum, frame):
+    raise SystemExit(128 + signum)
+
+
+def _solve_portfolio_configuration(configuration, items, results, parent_pid):
+    if sys.platform != "win32":
+        # Own process group, so the solver executable started by pulp is killed along with this process
+        os.setpgrp()
+        threading.Thread(target=_kill_process_group_when_orphaned, args=(parent_pid,), daemon=True).start()
+
+    start_time = time.time()
+    try:
+        problem, xcpt = build_scheduling_problem(*items)
+        if configuration.get("warm_start"):
+            for variable in xcpt.values():
+                variable.setInitialValue(0)
+            for key in create_greedy_assignments(*items):
+                xcpt[key].setInitialValue(1)
+
+        solver = getattr(pulp, configuration["solver"])(msg=False, **configuration["options"])
+        status_name = pulp.LpStatus[problem.solve(solver)]
+        assignments = list(iterate_assignments(xcpt))
+    except Exception as e:
+        status_name, assignments = f"Error: {e}", None
+
+    results.put((configuration["name"], status_name, assignments, time.time() - start_time))
+
+
+def _kill_process_group_when_orphaned(parent_pid):
+    # Last resort when the parent is killed without running its cleanup (e.g. SIGKILL):
+    # the worker is re-parented, so it kills its own process group including the solver executable
+    while os.getppid() == parent_pid:
+        time.sleep(1)
+    os.killpg(0, signal.SIGKILL)
+
+
+def _kill_process_trees(processes):
+    for process in processes.values():
+        _kill_process_tree(process)
+        process.join()
+
+
+def _kill_process_tree(process):
+    if sys.platform == "win32":  # For Windows
+        subprocess.call(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:  # For Linux and macOS
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            # The worker had not created its process group yet
+            process.kill()
+
+
+def create_greedy_assignments(C, P, E, Ce, caregiver_unavailability, patient_unavailability, patient_equipment_mapping):
+    # Quick heuristic schedule used as a warm start: book each patient's sessions per equipment
+    # in the earliest block of consecutive slots where a single qualified caregiver is free
+    busy_caregivers, busy_patients, busy_equipments = set(), set(), set()
+    assignments = []
+    for p in P:
+        for e, num_appointments in patient_equipment_mapping.get(p, []):
+            booked = False
+            for start in T:
+                block = range(start, start + num_appointments)
+                if block.stop > T.stop:
+                    break
+                if any(t in patient_unavailability.get(p, []) or (p, t) in busy_patients or (e, t) in busy_equipments
+                       for t in block):
+                    continue
                 for c in C:
-                    for e in E:
-                        problem_feasible += xcpt[c, p, t, e] == 0, f"Unavailable_Patient_{p}{c}{t}_{e}"
+                    if e not in Ce.get(c, []):
+                        continue
+                    if any(t in caregiver_unavailability.get(c, []) or (c, t) in busy_caregivers for t in block):
+                        continue
+                    for t in block:
+                        busy_caregivers.add((c, t))
+                        busy_patients.add((p, t))
+                        busy_equipments.add((e, t))
+                        assignments.append((c, p, t, e))
+                    booked = True
+                    break
+                if booked:
+                    break
+    return assignments
 
-        for e in E:
-            for t in T:
-                problem_feasible += pulp.lpSum(xcpt[c, p, t, e] for c in C for p in P) <= 1, f"Equipment_{e}time{t}"
 
-        for c in C:
-            allowed_equipments = Ce.get(c, [])
-            for e in E:
-                if e not in allowed_equipments:
-                    for p in P:
-                        for t in T:
-                            problem_feasible += xcpt[c, p, t, e] == 0, f"Caregiver_{c}cannot_use{e}at_time{t}for_patient{p}"
-
-        for p in P:
-            required_equipments = dict(patient_equipment_mapping.get(p, []))
-            for e in E:
-                if e not in required_equipments:
-                    for c in C:
-                        for t in T:
-                            problem_feasible += xcpt[c, p, t, e] == 0, f"Patient_{p}doesnt_need{e}at_time{t}with_caregiver{c}"
-
-        for p in P:
-            required_equipments = dict(patient_equipment_mapping.get(p, []))
-            for e, num_appointments in required_equipments.items():
-                problem_feasible += pulp.lpSum(
-                    xcpt[c, p, t, e] for c in C for t in T) <= num_appointments, f"Patient_{p}Equipment{e}_Appointments"
-
-        # Solve the modified problem
-        status_feasible = problem_feasible.solve()
-
-        if pulp.LpStatus[status_feasible] == 'Optimal':
-            for c in C:
-                for p in P:
-                    for t in T:
-                        for e in E:
-                            if pulp.value(xcpt[c, p, t, e]) == 1:
-                                schedule[t][c] = f"{p}, {e}"
-        else:
-            print("No feasible solution found. Check constraints and availability.")
-
-    save_schedule_to_excel(schedule, input_file_path, output_file_path)
+def save_schedule_to_excel(schedule, input_file, output_file):
+    save_assignments_to_excel(extract_assignments_from_schedule(schedule), input_file, output_file)
 
 
-def save_schedule_to_excel(schedule, input_file, output_file):
+def save_assignments_to_excel(assignments, input_file, output_file):
     # Define sets
     C, P, E, Ce, caregiver_unavailability, patient_unavailability, patient_equipment_mapping = \
         excel_sheets_to_items(input_file)
 
-    # Convert schedule to DataFrame and transpose
-    df_schedule = pd.DataFrame(schedule).transpose()
-    df_schedule.index = [f"{hour}:00" for hour in T]  # Set the time slots (rows) from 8:00 to 17:00
-    df_schedule.columns = C
-
     # Ensure the output directory exists
     output_dir = os.path.dirname(output_file)
     os.makedirs(output_dir, exist_ok=True)
 
-    # Export the DataFrame to an Excel file
-    df_schedule.to_excel(output_file, index=True, engine='openpyxl')
-
-    # Load the workbook and select the active worksheet
-    workbook = load_workbook(output_file)
+    # Time slots as rows from 8:00 to 17:00 and caregivers as columns
+    workbook = Workbook()
     worksheet = workbook.active
+    caregiver_columns = {caregiver: col_idx for col_idx, caregiver in enumerate(C, start=2)}
+    for caregiver, col_idx in caregiver_columns.items():
+        worksheet.cell(row=1, column=col_idx, value=caregiver).font = Font(bold=True)
+    for row_idx, hour in enumerate(T, start=2):
+        worksheet.cell(row=row_idx, column=1, value=f"{hour}:00").font = Font(bold=True)
 
     # Equipment colors mapping
     equipment_colors = {equipment: generate_random_color() for equipment in E}
 
-    # Apply colors to cells based on equipment
-    for row_idx, row in enumerate(
-            worksheet.iter_rows(min_row=2, min_col=2, max_row=worksheet.max_row, max_col=worksheet.max_column),
-            start=8):  # starting at 8:00 (adjust based on time slots)
-        for col_idx, cell in enumerate(row, start=0):
-            caregiver_name = C[col_idx]
-
-            # Check caregiver unavailability
-            if caregiver_name in caregiver_unavailability and row_idx in caregiver_unavailability[caregiver_name]:
-                cell.value = "Unavailable"
-            else:
-                # Extract patient and equipment from the cell value
-                cell_value = cell.value
-                if cell_value:
-                    patient, equipment = cell_value.split(", ")
-                    # Apply color based on equipment
-                    if equipment in equipment_colors:
-                        aRGB_color = equipment_colors[equipment]
-                        cell.fill = PatternFill(start_color=aRGB_color, end_color=aRGB_color, fill_type="solid")
+    # Write each assignment into its cell as it arrives, colored based on equipment
+    patients_and_equipments_dict = {}
+    for caregiver, patient, hour, equipment in assignments:
+        if caregiver not in caregiver_columns or hour not in T:
+            print(f"Skipping assignment of {patient} with {equipment} to unknown caregiver {caregiver} or time {hour}")
+            continue
+        cell = worksheet.cell(row=hour - T.start + 2, column=caregiver_columns[caregiver], value=f"{patient}, {equipment}")
+        if equipment in equipment_colors:
+            aRGB_color = equipment_colors[equipment]
+            cell.fill = PatternFill(start_color=aRGB_color, end_color=aRGB_color, fill_type="solid")
+
+        patient_equipments = patients_and_equipments_dict.setdefault(patient, {})
+        patient_equipments[equipment] = patient_equipments.get(equipment, 0) + 1
+
+    # Mark caregiver unavailability
+    for caregiver, col_idx in caregiver_columns.items():
+        for hour in caregiver_unavailability.get(caregiver, []):
+            if hour in T:
+                cell = worksheet.cell(row=hour - T.start + 2, column=col_idx, value="Unavailable")
+                cell.fill = PatternFill(fill_type=None)
 
     # Add a map of equipment and colors to the Excel file
     equipment_color_map_start_row = worksheet.max_row + 3
@@ -246,8 +540,7 @@ def save_schedule_to_excel(schedule, input_file, output_file):
         color_cell.value = ""
 
     # Now, create a new sheet for unscheduled patients
-    unscheduled_patients = create_a_list_of_patients_who_are_not_part_of_the_schedule(schedule,
-                                                                                      patient_equipment_mapping)
+    unscheduled_patients = remove_scheduled_appointments(patient_equipment_mapping, patients_and_equipments_dict)
 
     # Create a new worksheet for unscheduled patients
     unscheduled_worksheet = workbook.create_sheet("Unscheduled Patients")
@@ -277,23 +570,7 @@ def generate_random_color():
     blue = format(random.randint(150, 255), '02X')
     return f"{alpha}{red}{green}{blue}"
 
-def create_a_list_of_patients_who_are_not_part_of_the_schedule(schedule, patient_equipment_mapping):
-    # Copy the original patient-equipment mapping to avoid modifying it
-    patients_unscheduled = copy.deepcopy(patient_equipment_mapping)
-
-    # Extract the patients and equipment from the schedule
-    scheduled_patients_and_equipments = extract_patients_from_schedule(schedule)
-
-    # Build a dictionary of scheduled patients and their equipment counts
-    patients_and_equipments_dict = {}
-    for patient, equipment in scheduled_patients_and_equipments:
-        if patient not in patients_and_equipments_dict:
-            patients_and_equipments_dict[patient] = {}
-        if equipment in patients_and_equipments_dict[patient]:
-            patients_and_equipments_dict[patient][equipment] += 1
-        else:
-            patients_and_equipments_dict[patient][equipment] = 1
-
+def remove_scheduled_appointments(patients_unscheduled, patients_and_equipments_dict):
     # Update the unscheduled patients
     updated_patients_unscheduled = {}
     for patient, equipment_list in patients_unscheduled.items():
@@ -315,20 +592,19 @@ def create_a_list_of_patients_who_are_not_part_of_the_schedule(schedule, patient
 
     return updated_patients_unscheduled
 
-def extract_patients_from_schedule(schedule):
-    patient_list = []
+def extract_assignments_from_schedule(schedule):
+    # Yield (caregiver, patient, time, equipment) for every assigned cell of a {time: {caregiver: cell}} schedule
     for hour, caregivers in schedule.items():
         for caregiver, patient_equipment in caregivers.items():
-            if patient_equipment:  # Check if there's a patient assigned
-                if patient_equipment.strip().lower() == "unavailable":  # Skip "Unavailable" entries
-                    continue
-                try:
-                    patient, equipment = patient_equipment.split(', ')
-                    patient_list.append((patient.strip(), equipment.strip()))
-                except ValueError as e:
-                    print(f"Error splitting patient_equipment '{patient_equipment}': {e}")
-    return patient_list
-
+            if not isinstance(patient_equipment, str) or not patient_equipment:  # Check if there's a patient assigned
+                continue
+            if patient_equipment.strip().lower() == "unavailable":  # Skip "Unavailable" entries
+                continue
+            try:
+                patient, equipment = patient_equipment.split(', ')
+                yield caregiver, patient.strip(), hour, equipment.strip()
+            except ValueError as e:
+                print(f"Error splitting patient_equipment '{patient_equipment}': {e}")
 
 def main():
     input_file = r"C:\Users\morsh\Desktop\personal_projects\soroka_solution\small_rehabilitation_data.xlsx"
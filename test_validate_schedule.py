@@ -0,0 +1,123 @@
+from validate_schedule import validate_schedule_items
+
+
+def small_instance():
+    C = ["Caregiver1", "Caregiver2"]
+    P = ["Patient1", "Patient2"]
+    E = ["Equipment1", "Equipment2"]
+    Ce = {"Caregiver1": ["Equipment1", "Equipment2"], "Caregiver2": ["Equipment2"]}
+    caregiver_unavailability = {"Caregiver2": [12]}
+    patient_unavailability = {"Patient2": [8]}
+    patient_equipment_mapping = {"Patient1": [("Equipment1", 2)], "Patient2": [("Equipment2", 1)]}
+    return C, P, E, Ce, caregiver_unavailability, patient_unavailability, patient_equipment_mapping
+
+
+def valid_schedule():
+    return {
+        8: {"Caregiver1": "Patient1, Equipment1", "Caregiver2": ""},
+        9: {"Caregiver1": "Patient1, Equipment1", "Caregiver2": "Patient2, Equipment2"},
+        12: {"Caregiver1": "", "Caregiver2": "Unavailable"},
+    }
+
+
+def rules(schedule, allow_unscheduled=False, instance=None):
+    violations = validate_schedule_items(schedule, *(instance or small_instance()), allow_unscheduled=allow_unscheduled)
+    return sorted(violation["rule"] for violation in violations)
+
+
+def test_valid_schedule_has_no_violations():
+    assert rules(valid_schedule()) == []
+
+
+def test_caregiver_clash():
+    schedule = valid_schedule()
+    schedule[10] = {"Caregiver1": "Patient1, Equipment2; Patient2, Equipment2"}
+    assert "caregiver_clash" in rules(schedule)
+
+
+def test_patient_clash():
+    schedule = valid_schedule()
+    schedule[9]["Caregiver2"] = "Patient1, Equipment2"
+    assert "patient_clash" in rules(schedule)
+
+
+def test_equipment_clash():
+    schedule = valid_schedule()
+    schedule[10] = {"Caregiver1": "Patient1, Equipment2", "Caregiver2": "Patient2, Equipment2"}
+    assert "equipment_clash" in rules(schedule)
+
+
+def test_caregiver_unavailable():
+    schedule = valid_schedule()
+    schedule[9]["Caregiver2"] = ""
+    schedule[12]["Caregiver2"] = "Patient2, Equipment2"
+    assert rules(schedule) == ["caregiver_unavailable"]
+
+
+def test_patient_unavailable():
+    schedule = valid_schedule()
+    schedule[9]["Caregiver2"] = ""
+    schedule[8]["Caregiver2"] = "Patient2, Equipment2"
+    assert rules(schedule) == ["patient_unavailable"]
+
+
+def test_caregiver_not_qualified_and_equipment_not_needed():
+    schedule = valid_schedule()
+    schedule[10] = {"Caregiver2": "Patient2, Equipment1"}
+    assert rules(schedule) == ["caregiver_not_qualified", "demand", "equipment_not_needed"]
+
+
+def test_demand():
+    schedule = valid_schedule()
+    schedule[9]["Caregiver2"] = ""
+    assert rules(schedule) == ["demand"]
+    assert rules(schedule, allow_unscheduled=True) == []
+
+
+def test_continuity_gap_and_caregiver_change():
+    schedule = valid_schedule()
+    schedule[9]["Caregiver1"] = ""
+    schedule[10] = {"Caregiver1": "Patient1, Equipment1"}
+    assert rules(schedule) == ["continuity"]
+
+    instance = small_instance()
+    instance[3]["Caregiver2"].append("Equipment1")
+    schedule = valid_schedule()
+    schedule[9] = {"Caregiver1": "Patient2, Equipment2", "Caregiver2": "Patient1, Equipment1"}
+    assert rules(schedule, instance=instance) == ["continuity"]
+
+
+def test_partial_block():
+    schedule = valid_schedule()
+    schedule[9]["Caregiver1"] = ""
+    assert rules(schedule, allow_unscheduled=True) == ["partial_block"]
+
+
+def test_unknown_and_unparsable_cells():
+    schedule = valid_schedule()
+    schedule[10] = {"Caregiver1": "Patient9, Equipment1", "Caregiver2": "Patient2"}
+    assert rules(schedule) == ["parse", "unknown"]
+
+
+def test_large_synthetic_instance():
+    # Caregiver i treats a different single-session patient with its own equipment i in every time slot
+    times = range(8, 18)
+    C = [f"Caregiver{i}" for i in range(300)]
+    E = [f"Equipment{i}" for i in range(300)]
+    P = [f"Patient{i}" for i in range(len(C) * len(times))]
+    Ce = {c: [e] for c, e in zip(C, E)}
+    patient_equipment_mapping = {}
+    schedule = {t: {} for t in times}
+    for i, (c, e) in enumerate(zip(C, E)):
+        for j, t in enumerate(times):
+            p = P[i * len(times) + j]
+            patient_equipment_mapping[p] = [(e, 1)]
+            schedule[t][c] = f"{p}, {e}"
+    instance = (C, P, E, Ce, {C[0]: [8]}, {}, patient_equipment_mapping)
+    schedule[8][C[0]] = "Unavailable"
+
+    assert rules(schedule, allow_unscheduled=True, instance=instance) == []
+
+    schedule[17][C[1]] = f"{P[0]}, {E[2]}"
+    assert rules(schedule, allow_unscheduled=True, instance=instance) == ["caregiver_not_qualified", "demand",
+                                                                          "equipment_clash", "equipment_not_needed"]
@@ -2,6 +2,7 @@ import pandas as pd
 import re
 from helper_functions import excel_sheets_to_items
 from create_schedule import save_schedule_to_excel
+from validate_schedule import validate_schedule_items, print_violations
 
 T = range(8, 18)
 
@@ -10,6 +11,11 @@ def replace_unavailable_patient_with_matching_available_one(input_file_path, sch
     C, P, E, Ce, caregiver_unavailability, patient_unavailability, patient_equipment_mapping = \
         excel_sheets_to_items(input_file_path)
 
+    # Add the new unavailability times, the list itself is consumed while patients are replaced
+    updated_patient_unavailability = {patient: list(hours) for patient, hours in patient_unavailability.items()}
+    for patient, unavailable_time in patients_unavailability_list.items():
+        updated_patient_unavailability.setdefault(patient, []).append(unavailable_time)
+
     # Read the Unscheduled Patients sheet directly from the Excel file
     unscheduled_patients_df = pd.read_excel(schedule, sheet_name="Unscheduled Patients")
 
@@ -42,7 +48,7 @@ def replace_unavailable_patient_with_matching_available_one(input_file_path, sch
                         f"Replacing {unavailable_patient} with {unscheduled_patient} at {unavailable_time} using equipment {eq}")
 
                     # Update schedule by replacing patient_info
-                    caregivers = schedule[unavailable_time]
+                    caregivers = updated_schedule[unavailable_time]
                     for caregiver_key, patient_info in caregivers.items():
                         if caregiver_key == caregiver:
                             new_patient_info = re.sub(f"{unavailable_patient}, Equipment\d+",
@@ -63,7 +69,13 @@ def replace_unavailable_patient_with_matching_available_one(input_file_path, sch
             if replacement_found:
                 break
 
-    save_schedule_to_excel(schedule, input_file_path, output_file_path)
+    # Check the repaired schedule before saving it, replacing patients can break the scheduling rules
+    violations = validate_schedule_items(updated_schedule, C, P, E, Ce, caregiver_unavailability,
+                                         updated_patient_unavailability, patient_equipment_mapping,
+                                         allow_unscheduled=True)
+    print_violations(violations)
+
+    save_schedule_to_excel(updated_schedule, input_file_path, output_file_path)
 
 def find_caregivers_for_patients(schedule, patients_unavailability_list):
     # Create an empty list to store caregivers
@@ -0,0 +1,171 @@
+import numpy as np
+from helper_functions import excel_sheets_to_items
+
+T = range(8, 18)  # Time slots from 8 AM to 5 PM (represented as hours)
+
+UNAVAILABLE_CELL = "unavailable"
+
+
+def schedule_to_arrays(schedule, C, P, E):
+    # Flatten a {time: {caregiver: "Patient, Equipment"}} schedule into parallel index arrays.
+    # Cells that cannot be mapped onto C/P/E/T are returned separately as violations.
+    caregiver_index = {c: i for i, c in enumerate(C)}
+    patient_index = {p: i for i, p in enumerate(P)}
+    equipment_index = {e: i for i, e in enumerate(E)}
+
+    caregivers, patients, times, equipments = [], [], [], []
+    violations = []
+    for t, caregivers_at_time in schedule.items():
+        for c, cell_value in caregivers_at_time.items():
+            if not isinstance(cell_value, str) or not cell_value.strip():
+                continue
+            if cell_value.strip().lower() == UNAVAILABLE_CELL:
+                continue
+            # A cell normally holds a single "Patient, Equipment" pair, several pairs are separated by "; "
+            for entry in cell_value.split("; "):
+                try:
+                    p, e = [value.strip() for value in entry.split(", ")]
+                except ValueError:
+                    violations.append(_violation("parse", f"Cannot parse '{entry}' for caregiver {c} at time {t}",
+                                                 caregiver=c, time=t))
+                    continue
+                if c not in caregiver_index or p not in patient_index or e not in equipment_index or t not in T:
+                    violations.append(_violation("unknown", f"Unknown caregiver, patient, equipment or time in "
+                                                            f"'{entry}' for caregiver {c} at time {t}",
+                                                 caregiver=c, patient=p, time=t, equipment=e))
+                    continue
+                caregivers.append(caregiver_index[c])
+                patients.append(patient_index[p])
+                times.append(t - T.start)
+                equipments.append(equipment_index[e])
+
+    arrays = tuple(np.array(values, dtype=np.int64) for values in (caregivers, patients, times, equipments))
+    return arrays, violations
+
+
+def validate_schedule(schedule, input_file_path, allow_unscheduled=False):
+    # Define sets
+    C, P, E, Ce, caregiver_unavailability, patient_unavailability, patient_equipment_mapping = \
+        excel_sheets_to_items(input_file_path)
+
+    return validate_schedule_items(schedule, C, P, E, Ce, caregiver_unavailability, patient_unavailability,
+                                   patient_equipment_mapping, allow_unscheduled)
+
+
+def validate_schedule_items(schedule, C, P, E, Ce, caregiver_unavailability, patient_unavailability,
+                            patient_equipment_mapping, allow_unscheduled=False):
+    # Check a schedule against Constraints 1-9 of create_original_schedule.
+    # With allow_unscheduled=True Constraint 6 only rejects over-scheduling, as in the maximize-treated fallback,
+    # but a repeated treatment must still be booked as a whole block or not at all, as in the lexicographic model.
+    (ci, pi, ti, ei), violations = schedule_to_arrays(schedule, C, P, E)
+    n_c, n_p, n_t, n_e = len(C), len(P), len(T), len(E)
+
+    # Constraints 1, 2 & 5: a caregiver, patient or equipment appears at most once per time slot
+    for rule, constraint, owner_index, owner_size, owners in (("caregiver_clash", 1, ci, n_c, C),
+                                                              ("patient_clash", 2, pi, n_p, P),
+                                                              ("equipment_clash", 5, ei, n_e, E)):
+        keys, counts = np.unique(owner_index * n_t + ti, return_counts=True)
+        for key, count in zip(keys[counts > 1], counts[counts > 1]):
+            owner, t = owners[key // n_t], T[key % n_t]
+            violations.append(_violation(rule, f"{owner} is booked {count} times at time {t}",
+                                         constraint=constraint, time=t, count=int(count),
+                                         **{rule.split("_")[0]: owner}))
+
+    # Constraints 3 & 4: caregivers and patients are only assigned during available time slots
+    caregiver_unavailable = _unavailability_matrix(C, caregiver_unavailability)
+    patient_unavailable = _unavailability_matrix(P, patient_unavailability)
+    for rule, constraint, mask in (("caregiver_unavailable", 3, caregiver_unavailable[ci, ti]),
+                                   ("patient_unavailable", 4, patient_unavailable[pi, ti])):
+        for i in np.flatnonzero(mask):
+            violations.append(_assignment_violation(rule, constraint, "is scheduled while unavailable",
+                                                    C, P, E, ci[i], pi[i], ti[i], ei[i]))
+
+    # Constraints 7 & 8: caregivers are qualified for the equipment and patients need it
+    qualified = np.zeros((n_c, n_e), dtype=bool)
+    for c_i, c in enumerate(C):
+        for e in Ce.get(c, []):
+            if e in E:
+                qualified[c_i, E.index(e)] = True
+    required = np.zeros((n_p, n_e), dtype=np.int64)
+    for p_i, p in enumerate(P):
+        for e, num_appointments in patient_equipment_mapping.get(p, []):
+            if e in E:
+                required[p_i, E.index(e)] = num_appointments
+    for rule, constraint, mask in (("caregiver_not_qualified", 7, ~qualified[ci, ei]),
+                                   ("equipment_not_needed", 8, required[pi, ei] == 0)):
+        for i in np.flatnonzero(mask):
+            violations.append(_assignment_violation(rule, constraint, "uses equipment outside the allowed set",
+                                                    C, P, E, ci[i], pi[i], ti[i], ei[i]))
+
+    # Constraint 6: each patient receives the required number of appointments per equipment
+    scheduled = np.zeros((n_p, n_e), dtype=np.int64)
+    np.add.at(scheduled, (pi, ei), 1)
+    demand_mismatch = scheduled > required if allow_unscheduled else scheduled != required
+    for p_i, e_i in zip(*np.nonzero(demand_mismatch)):
+        violations.append(_violation("demand", f"{P[p_i]} has {scheduled[p_i, e_i]} appointments with {E[e_i]}, "
+                                               f"{required[p_i, e_i]} required",
+                                     constraint=6, patient=P[p_i], equipment=E[e_i],
+                                     count=int(scheduled[p_i, e_i]), required=int(required[p_i, e_i])))
+
+    # Constraint 9: repeated sessions of a patient with the same equipment are consecutive and with one caregiver
+    order = np.lexsort((ti, ei, pi))
+    group = (pi * n_e + ei)[order]
+    sorted_times, sorted_caregivers = ti[order], ci[order]
+    same_group = group[1:] == group[:-1]
+    broken = same_group & ((sorted_times[1:] - sorted_times[:-1] != 1) | (sorted_caregivers[1:] != sorted_caregivers[:-1]))
+    for key in np.unique(group[1:][broken]):
+        p, e = P[key // n_e], E[key % n_e]
+        violations.append(_violation("continuity", f"Sessions of {p} with {e} are not consecutive with the same caregiver",
+                                     constraint=9, patient=p, equipment=e))
+
+    # Constraint 9 for partial schedules: a repeated treatment is never booked as a partial block
+    if allow_unscheduled:
+        partial_block = (required > 1) & (scheduled > 0) & (scheduled < required)
+        for p_i, e_i in zip(*np.nonzero(partial_block)):
+            violations.append(_violation("partial_block", f"{P[p_i]} has only {scheduled[p_i, e_i]} of the "
+                                                          f"{required[p_i, e_i]} consecutive appointments with {E[e_i]}",
+                                         constraint=9, patient=P[p_i], equipment=E[e_i],
+                                         count=int(scheduled[p_i, e_i]), required=int(required[p_i, e_i])))
+
+    return violations
+
+
+def _unavailability_matrix(names, unavailability):
+    matrix = np.zeros((len(names), len(T)), dtype=bool)
+    for i, name in enumerate(names):
+        hours = [t - T.start for t in unavailability.get(name, []) if t in T]
+        matrix[i, hours] = True
+    return matrix
+
+
+def _assignment_violation(rule, constraint, reason, C, P, E, c_i, p_i, t_i, e_i):
+    c, p, t, e = C[c_i], P[p_i], T[t_i], E[e_i]
+    return _violation(rule, f"Caregiver {c} with Patient {p} at time {t} using {e} {reason}",
+                      constraint=constraint, caregiver=c, patient=p, time=t, equipment=e)
+
+
+def _violation(rule, message, constraint=None, **details):
+    violation = {"rule": rule, "constraint": constraint, "message": message}
+    violation.update(details)
+    return violation
+
+
+def print_violations(violations):
+    if not violations:
+        print("Schedule satisfies all scheduling rules")
+        return
+    print(f"Schedule has {len(violations)} violations:")
+    for violation in violations:
+        print(f"[{violation['rule']}] {violation['message']}")
+
+
+def main():
+    from update_schedule import create_schedule_from_excel, reformat_schedule_with_regex
+
+    input_file = r"C:\Users\morsh\Desktop\personal_projects\soroka_solution\small_rehabilitation_data.xlsx"
+    schedule_file_path = r"C:\Users\morsh\Desktop\personal_projects\soroka_solution\generated_schedule.xlsx"
+    schedule = reformat_schedule_with_regex(create_schedule_from_excel(schedule_file_path))
+    print_violations(validate_schedule(schedule, input_file))
+
+if __name__ == "__main__":
+    main()